@@ -12,7 +12,8 @@ echo ========================================
 echo.
 
 echo Esta ação vai:
-echo   - Apagar o banco de dados (financas.db) nesta pasta
+echo   - Apagar o banco de dados (financas.db, financas.db-wal, financas.db-shm) nesta pasta
+echo   - Apagar o login salvo (sessao.token) e o relatório do monitor (financas_monitor.log)
 echo   - Desinstalar dependências Python do projeto (PyQt5)
 echo   - Limpar caches (__pycache__)
 echo.
@@ -32,6 +33,13 @@ if exist "%~dp0financas.db" (
 ) else (
   echo Banco de dados não encontrado aqui.
 )
+:: Arquivos do modo WAL (um -wal que sobrar seria reaplicado no banco novo)
+if exist "%~dp0financas.db-wal" del /F /Q "%~dp0financas.db-wal"
+if exist "%~dp0financas.db-shm" del /F /Q "%~dp0financas.db-shm"
+
+:: Remover sessão salva ("Lembrar de mim") e relatório do monitor
+if exist "%~dp0sessao.token" del /F /Q "%~dp0sessao.token"
+if exist "%~dp0financas_monitor.log" del /F /Q "%~dp0financas_monitor.log"
 
 :: Remover caches
 if exist __pycache__ rmdir /S /Q __pycache__
@@ -3,11 +3,37 @@ import sqlite3
 import hashlib
 import hmac
 import secrets
+import threading
+import time
+from datetime import date, timedelta
+
+from .modelos import Transacao, AlertaOrcamento
+from .recorrencia import FREQUENCIAS, ocorrencias, para_data
+from .manutencao import ManutencaoBanco
 
 # Caminho base do app
 APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DEFAULT_DB_PATH = os.path.join(APP_DIR, "financas.db")
 
+# Limite de parâmetros por "IN (...)" (SQLite antigo aceita 999)
+LOTE_IDS = 500
+
+# Linha completa (para desfazer exclusões); explícita para não depender de SELECT *
+COLUNAS_COMPLETAS = "id, descricao, valor, tipo, categoria, data, usuario_id, data_criacao"
+
+# Frações do limite mensal que geram alerta (aviso e estouro)
+LIMIARES_ORCAMENTO = (0.8, 1.0)
+
+# Sessões "lembrar de mim"
+SESSAO_VALIDADE_DIAS = 30
+SESSOES_POR_USUARIO = 5
+
+# Versão do esquema em PRAGMA user_version (migrações que não cabem em IF NOT EXISTS)
+VERSAO_ESQUEMA = 1
+
+# Quantas entradas do log de alterações são mantidas
+LOG_ALTERACOES_MAX = 10_000
+
 
 class DatabaseManager:
     """Gerenciador de banco de dados SQLite simples e estável"""
@@ -15,15 +41,36 @@ class DatabaseManager:
     def __init__(self, db_path: str = None):
         # Garante DB dentro da pasta do app
         self.db_path = db_path or DEFAULT_DB_PATH
+        self._conn_monitor = None
+        self._data_version = None
+        # Callbacks chamados com a lista de AlertaOrcamento após cada gravação
+        # (podem ser chamados de outra thread; a UI repassa via sinal Qt)
+        self.ouvintes_orcamento = []
+        self.alertas_pendentes = []
+        self._trava_orcamento = threading.Lock()
         self.init_database()
+        self.manutencao = ManutencaoBanco(self.db_path)
+
+    def fechar(self):
+        """Fecha a conexão persistente do monitor de alterações"""
+        if self._conn_monitor is not None:
+            self._conn_monitor.close()
+            self._conn_monitor = None
+
+    def _conectar(self):
+        """Conexão usada por todos os métodos (ponto único para rastrear SQL)"""
+        return sqlite3.connect(self.db_path)
 
     def init_database(self):
         """Inicializa o banco de dados"""
         try:
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
 
+                # Vale na hora em banco novo; em banco existente a conversão fica para a manutenção
+                cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
                 cursor.execute(
                     '''CREATE TABLE IF NOT EXISTS usuarios (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -46,11 +93,154 @@ class DatabaseManager:
                         data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )'''
                 )
+                # Lista do usuário ordenada por data sem varredura nem sort (ver tests/test_planos.py)
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_transacoes_usuario_data ON transacoes (usuario_id, data)"
+                )
+
+                cursor.execute(
+                    '''CREATE TABLE IF NOT EXISTS sessoes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        token_hash TEXT UNIQUE NOT NULL,
+                        usuario_id INTEGER NOT NULL,
+                        criada_em INTEGER NOT NULL,
+                        expira_em INTEGER NOT NULL
+                    )'''
+                )
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_usuario ON sessoes (usuario_id)")
+
+                # Log de alterações (change-feed entre processos)
+                cursor.execute(
+                    '''CREATE TABLE IF NOT EXISTS transacoes_log (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        transacao_id INTEGER NOT NULL,
+                        usuario_id INTEGER,
+                        operacao TEXT NOT NULL
+                    )'''
+                )
+                cursor.execute(
+                    '''CREATE TRIGGER IF NOT EXISTS transacoes_log_insert AFTER INSERT ON transacoes
+                    BEGIN
+                        INSERT INTO transacoes_log (transacao_id, usuario_id, operacao) VALUES (NEW.id, NEW.usuario_id, 'I');
+                    END'''
+                )
+                cursor.execute(
+                    '''CREATE TRIGGER IF NOT EXISTS transacoes_log_update AFTER UPDATE ON transacoes
+                    BEGIN
+                        INSERT INTO transacoes_log (transacao_id, usuario_id, operacao) VALUES (NEW.id, NEW.usuario_id, 'U');
+                    END'''
+                )
+                cursor.execute(
+                    '''CREATE TRIGGER IF NOT EXISTS transacoes_log_delete AFTER DELETE ON transacoes
+                    BEGIN
+                        INSERT INTO transacoes_log (transacao_id, usuario_id, operacao) VALUES (OLD.id, OLD.usuario_id, 'D');
+                    END'''
+                )
+                # Recorrências: regras + ocorrências já geradas (deduplicação por regra e vencimento)
+                cursor.execute(
+                    '''CREATE TABLE IF NOT EXISTS recorrencias (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        usuario_id INTEGER NOT NULL,
+                        descricao TEXT NOT NULL,
+                        valor REAL NOT NULL,
+                        tipo TEXT NOT NULL,
+                        categoria TEXT NOT NULL,
+                        frequencia TEXT NOT NULL,
+                        intervalo INTEGER NOT NULL DEFAULT 1,
+                        data_inicio DATE NOT NULL,
+                        data_fim DATE,
+                        gerada_ate DATE,
+                        data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )'''
+                )
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_recorrencias_usuario ON recorrencias (usuario_id)")
+                cursor.execute(
+                    '''CREATE TABLE IF NOT EXISTS recorrencias_geradas (
+                        recorrencia_id INTEGER NOT NULL,
+                        data_vencimento DATE NOT NULL,
+                        transacao_id INTEGER,
+                        PRIMARY KEY (recorrencia_id, data_vencimento)
+                    ) WITHOUT ROWID'''
+                )
+
+                # Orçamentos mensais por categoria + gasto do mês mantido por triggers
+                cursor.execute(
+                    '''CREATE TABLE IF NOT EXISTS orcamentos (
+                        usuario_id INTEGER NOT NULL,
+                        categoria TEXT NOT NULL,
+                        limite REAL NOT NULL,
+                        PRIMARY KEY (usuario_id, categoria)
+                    ) WITHOUT ROWID'''
+                )
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'gastos_mensais'")
+                backfill_gastos = cursor.fetchone() is None
+                cursor.execute(
+                    '''CREATE TABLE IF NOT EXISTS gastos_mensais (
+                        usuario_id INTEGER NOT NULL,
+                        mes TEXT NOT NULL,
+                        categoria TEXT NOT NULL,
+                        total REAL NOT NULL DEFAULT 0,
+                        PRIMARY KEY (usuario_id, mes, categoria)
+                    ) WITHOUT ROWID'''
+                )
+                if backfill_gastos:
+                    cursor.execute(
+                        '''INSERT INTO gastos_mensais (usuario_id, mes, categoria, total)
+                        SELECT usuario_id, substr(data, 1, 7), categoria, SUM(valor) FROM transacoes
+                        WHERE tipo = 'despesa' AND usuario_id IS NOT NULL
+                        GROUP BY usuario_id, substr(data, 1, 7), categoria'''
+                    )
+                cursor.execute(
+                    '''CREATE TRIGGER IF NOT EXISTS gastos_insert AFTER INSERT ON transacoes
+                    WHEN NEW.tipo = 'despesa' AND NEW.usuario_id IS NOT NULL
+                    BEGIN
+                        INSERT INTO gastos_mensais (usuario_id, mes, categoria, total)
+                        VALUES (NEW.usuario_id, substr(NEW.data, 1, 7), NEW.categoria, NEW.valor)
+                        ON CONFLICT (usuario_id, mes, categoria) DO UPDATE SET total = total + excluded.total;
+                    END'''
+                )
+                cursor.execute(
+                    '''CREATE TRIGGER IF NOT EXISTS gastos_delete AFTER DELETE ON transacoes
+                    WHEN OLD.tipo = 'despesa' AND OLD.usuario_id IS NOT NULL
+                    BEGIN
+                        UPDATE gastos_mensais SET total = total - OLD.valor
+                        WHERE usuario_id = OLD.usuario_id AND mes = substr(OLD.data, 1, 7) AND categoria = OLD.categoria;
+                    END'''
+                )
+                cursor.execute(
+                    '''CREATE TRIGGER IF NOT EXISTS gastos_update AFTER UPDATE OF valor, tipo, categoria, data, usuario_id ON transacoes
+                    BEGIN
+                        UPDATE gastos_mensais SET total = total - OLD.valor
+                        WHERE OLD.tipo = 'despesa'
+                          AND usuario_id = OLD.usuario_id AND mes = substr(OLD.data, 1, 7) AND categoria = OLD.categoria;
+                        INSERT INTO gastos_mensais (usuario_id, mes, categoria, total)
+                        SELECT NEW.usuario_id, substr(NEW.data, 1, 7), NEW.categoria, NEW.valor
+                        WHERE NEW.tipo = 'despesa' AND NEW.usuario_id IS NOT NULL
+                        ON CONFLICT (usuario_id, mes, categoria) DO UPDATE SET total = total + excluded.total;
+                    END'''
+                )
+
+                cursor.execute(
+                    "DELETE FROM transacoes_log WHERE seq <= (SELECT MAX(seq) FROM transacoes_log) - ?",
+                    (LOG_ALTERACOES_MAX,),
+                )
 
                 conn.commit()
+            self._migrar()
         except Exception as e:
             print(f"Erro ao inicializar banco: {e}")
 
+    def _migrar(self):
+        """Migrações por user_version; só passos rápidos (o VACUUM de conversão é da ManutencaoBanco)"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            versao = conn.execute("PRAGMA user_version").fetchone()[0]
+            if versao < 1:
+                conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        finally:
+            conn.close()
+
     # --- Senhas ---
     def _hash_password(self, senha: str) -> str:
         """Gera hash seguro (PBKDF2)"""
@@ -78,7 +268,7 @@ class DatabaseManager:
         """Insere usuário (com hash)"""
         try:
             senha_hash = self._hash_password(senha)
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "INSERT INTO usuarios (nome, email, senha) VALUES (?, ?, ?)",
@@ -96,7 +286,7 @@ class DatabaseManager:
     def verificar_login(self, email, senha):
         """Verifica credenciais (hash)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT id, nome, senha FROM usuarios WHERE email = ?",
@@ -113,27 +303,107 @@ class DatabaseManager:
             print(f"Erro ao verificar login: {e}")
             return None
 
+    # --- Sessões ---
+    def _hash_token(self, token: str) -> str:
+        """Token tem 256 bits aleatórios: SHA-256 basta (sem PBKDF2) e a busca é pelo hash"""
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def criar_sessao(self, usuario_id):
+        """Cria sessão e devolve o token (só o hash fica no banco); mantém no máximo SESSOES_POR_USUARIO"""
+        token = secrets.token_urlsafe(32)
+        agora = int(time.time())
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM sessoes WHERE expira_em <= ?", (agora,))
+                cursor.execute(
+                    "INSERT INTO sessoes (token_hash, usuario_id, criada_em, expira_em) VALUES (?, ?, ?, ?)",
+                    (self._hash_token(token), usuario_id, agora, agora + SESSAO_VALIDADE_DIAS * 86400),
+                )
+                cursor.execute(
+                    """
+                    DELETE FROM sessoes WHERE usuario_id = ? AND id NOT IN (
+                        SELECT id FROM sessoes WHERE usuario_id = ? ORDER BY id DESC LIMIT ?
+                    )
+                    """,
+                    (usuario_id, usuario_id, SESSOES_POR_USUARIO),
+                )
+                conn.commit()
+                return token
+        except Exception as e:
+            print(f"Erro ao criar sessão: {e}")
+            return None
+
+    def validar_sessao(self, token):
+        """Devolve (user_id, nome) se o token for válido e não expirado"""
+        if not token:
+            return None
+        token_hash = self._hash_token(token)
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT s.token_hash, u.id, u.nome FROM sessoes s
+                    JOIN usuarios u ON u.id = s.usuario_id
+                    WHERE s.token_hash = ? AND s.expira_em > ?
+                    """,
+                    (token_hash, int(time.time())),
+                )
+                row = cursor.fetchone()
+                if not row or not hmac.compare_digest(row[0], token_hash):
+                    return None
+                return (row[1], row[2])
+        except Exception as e:
+            print(f"Erro ao validar sessão: {e}")
+            return None
+
+    def revogar_sessao(self, token):
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM sessoes WHERE token_hash = ?", (self._hash_token(token),))
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Erro ao revogar sessão: {e}")
+            return False
+
+    def revogar_sessoes_usuario(self, usuario_id):
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM sessoes WHERE usuario_id = ?", (usuario_id,))
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Erro ao revogar sessões: {e}")
+            return False
+
     # --- Transações ---
     def inserir_transacao(self, descricao, valor, tipo, categoria, data, usuario_id):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "INSERT INTO transacoes (descricao, valor, tipo, categoria, data, usuario_id) VALUES (?, ?, ?, ?, ?, ?)",
                     (descricao, valor, tipo, categoria, data, usuario_id),
                 )
+                alertas = self._avaliar_orcamentos(cursor, [(usuario_id, valor, tipo, categoria, data)])
                 conn.commit()
-                return True
+            self._notificar_orcamento(alertas)
+            return True
         except Exception as e:
             print(f"Erro ao inserir transação: {e}")
             return False
 
     def buscar_transacoes(self, usuario_id):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = Transacao.row_factory
                 cursor.execute(
-                    "SELECT * FROM transacoes WHERE usuario_id = ? ORDER BY data DESC",
+                    f"SELECT {Transacao.COLUNAS} FROM transacoes WHERE usuario_id = ? ORDER BY data DESC",
                     (usuario_id,),
                 )
                 return cursor.fetchall()
@@ -141,10 +411,16 @@ class DatabaseManager:
             print(f"Erro ao buscar transações: {e}")
             return []
 
+    def carregar_painel(self, usuario_id, hoje=None):
+        """Tudo que o dashboard precisa ao abrir: (seq do log, transações); seguro em thread de fundo"""
+        self.materializar_recorrencias(usuario_id, hoje or date.today())
+        return self.ultima_sequencia(), self.buscar_transacoes(usuario_id)
+
     def atualizar_transacao(self, transacao_id, descricao, valor, tipo, categoria, data):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
+                antigas = self._linhas_orcamento(cursor, [transacao_id])
                 cursor.execute(
                     """
                     UPDATE transacoes
@@ -153,15 +429,17 @@ class DatabaseManager:
                     """,
                     (descricao, valor, tipo, categoria, data, transacao_id),
                 )
+                alertas = self._avaliar_orcamentos(cursor, self._linhas_orcamento(cursor, [transacao_id]), antigas)
                 conn.commit()
-                return True
+            self._notificar_orcamento(alertas)
+            return True
         except Exception as e:
             print(f"Erro ao atualizar transação: {e}")
             return False
 
     def excluir_transacao(self, transacao_id):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM transacoes WHERE id = ?", (transacao_id,))
                 conn.commit()
@@ -170,4 +448,466 @@ class DatabaseManager:
             print(f"Erro ao excluir transação: {e}")
             return False
 
+    # --- Transações em lote ---
+    def _em_lotes(self, ids):
+        ids = list(ids)
+        for i in range(0, len(ids), LOTE_IDS):
+            yield ids[i:i + LOTE_IDS]
+
+    def inserir_transacoes(self, transacoes, usuario_id):
+        """Insere várias (descricao, valor, tipo, categoria, data) numa só transação"""
+        transacoes = list(transacoes)
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    "INSERT INTO transacoes (descricao, valor, tipo, categoria, data, usuario_id) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(*t, usuario_id) for t in transacoes],
+                )
+                alertas = self._avaliar_orcamentos(cursor, [(usuario_id, *t[1:]) for t in transacoes])
+                conn.commit()
+            self._notificar_orcamento(alertas)
+            return True
+        except Exception as e:
+            print(f"Erro ao inserir transações: {e}")
+            return False
+
+    def atualizar_transacoes(self, alteracoes):
+        """Atualiza várias (id, descricao, valor, tipo, categoria, data) numa só transação"""
+        alteracoes = list(alteracoes)
+        ids = [a[0] for a in alteracoes]
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                antigas = self._linhas_orcamento(cursor, ids)
+                cursor.executemany(
+                    """
+                    UPDATE transacoes
+                    SET descricao = ?, valor = ?, tipo = ?, categoria = ?, data = ?
+                    WHERE id = ?
+                    """,
+                    [(d, v, tp, c, dt, tid) for tid, d, v, tp, c, dt in alteracoes],
+                )
+                alertas = self._avaliar_orcamentos(cursor, self._linhas_orcamento(cursor, ids), antigas)
+                conn.commit()
+            self._notificar_orcamento(alertas)
+            return True
+        except Exception as e:
+            print(f"Erro ao atualizar transações: {e}")
+            return False
+
+    def recategorizar_transacoes(self, transacao_ids, categoria):
+        """Troca a categoria de várias transações numa só transação"""
+        transacao_ids = list(transacao_ids)
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                antigas = self._linhas_orcamento(cursor, transacao_ids)
+                cursor.executemany(
+                    "UPDATE transacoes SET categoria = ? WHERE id = ?",
+                    [(categoria, tid) for tid in transacao_ids],
+                )
+                alertas = self._avaliar_orcamentos(cursor, self._linhas_orcamento(cursor, transacao_ids), antigas)
+                conn.commit()
+            self._notificar_orcamento(alertas)
+            return True
+        except Exception as e:
+            print(f"Erro ao recategorizar transações: {e}")
+            return False
+
+    def restaurar_categorias(self, pares):
+        """Volta a categoria de cada (id, categoria); só a categoria, para não desfazer outras edições"""
+        pares = list(pares)
+        ids = [tid for tid, _ in pares]
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                antigas = self._linhas_orcamento(cursor, ids)
+                cursor.executemany(
+                    "UPDATE transacoes SET categoria = ? WHERE id = ?",
+                    [(categoria, tid) for tid, categoria in pares],
+                )
+                alertas = self._avaliar_orcamentos(cursor, self._linhas_orcamento(cursor, ids), antigas)
+                conn.commit()
+            self._notificar_orcamento(alertas)
+            return True
+        except Exception as e:
+            print(f"Erro ao restaurar categorias: {e}")
+            return False
+
+    def excluir_transacoes(self, transacao_ids):
+        """Exclui por lista de ids; devolve as linhas removidas (para desfazer) ou None"""
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                removidas = []
+                for lote in self._em_lotes(transacao_ids):
+                    marcadores = ", ".join("?" * len(lote))
+                    cursor.execute(f"SELECT {COLUNAS_COMPLETAS} FROM transacoes WHERE id IN ({marcadores})", lote)
+                    removidas.extend(cursor.fetchall())
+                    cursor.execute(f"DELETE FROM transacoes WHERE id IN ({marcadores})", lote)
+                conn.commit()
+                return removidas
+        except Exception as e:
+            print(f"Erro ao excluir transações: {e}")
+            return None
+
+    def excluir_transacoes_por_filtro(self, usuario_id, categoria=None, tipo=None, data_inicio=None, data_fim=None):
+        """Exclui as transações do usuário que casam com o filtro; devolve as linhas removidas ou None"""
+        condicoes = ["usuario_id = ?"]
+        params = [usuario_id]
+        if categoria is not None:
+            condicoes.append("categoria = ?"); params.append(categoria)
+        if tipo is not None:
+            condicoes.append("tipo = ?"); params.append(tipo)
+        if data_inicio is not None:
+            condicoes.append("data >= ?"); params.append(data_inicio)
+        if data_fim is not None:
+            condicoes.append("data <= ?"); params.append(data_fim)
+        where = " AND ".join(condicoes)
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT {COLUNAS_COMPLETAS} FROM transacoes WHERE {where}", params)
+                removidas = cursor.fetchall()
+                cursor.execute(f"DELETE FROM transacoes WHERE {where}", params)
+                conn.commit()
+                return removidas
+        except Exception as e:
+            print(f"Erro ao excluir transações por filtro: {e}")
+            return None
+
+    def restaurar_transacoes(self, linhas):
+        """Reinsere linhas completas (mesmo id) devolvidas por uma exclusão em lote"""
+        linhas = list(linhas)
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    f"INSERT INTO transacoes ({COLUNAS_COMPLETAS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [tuple(linha) for linha in linhas],
+                )
+                # (id, descricao, valor, tipo, categoria, data, usuario_id, ...)
+                alertas = self._avaliar_orcamentos(cursor, [(l[6], l[2], l[3], l[4], l[5]) for l in linhas])
+                conn.commit()
+            self._notificar_orcamento(alertas)
+            return True
+        except Exception as e:
+            print(f"Erro ao restaurar transações: {e}")
+            return False
+
+    # --- Alterações entre processos ---
+    def banco_alterado(self):
+        """Consulta barata de PRAGMA data_version; True se outra conexão gravou desde a última chamada"""
+        try:
+            if self._conn_monitor is None:
+                self._conn_monitor = sqlite3.connect(self.db_path)
+            versao = self._conn_monitor.execute("PRAGMA data_version").fetchone()[0]
+            alterado = self._data_version is not None and versao != self._data_version
+            self._data_version = versao
+            return alterado
+        except Exception as e:
+            print(f"Erro ao consultar versão do banco: {e}")
+            return False
+
+    def ultima_sequencia(self):
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM transacoes_log")
+                return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Erro ao buscar sequência: {e}")
+            return 0
+
+    def buscar_alteracoes(self, usuario_id, desde_seq):
+        """Devolve (nova_seq, Transacao alteradas/inseridas, ids removidos) desde desde_seq.
+
+        Se o log já foi podado além de desde_seq, devolve (nova_seq, None, None): recarregar tudo.
+        """
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                # Subconsultas separadas: MIN e MAX juntos no mesmo SELECT viram varredura
+                cursor.execute(
+                    "SELECT (SELECT COALESCE(MAX(seq), 0) FROM transacoes_log), (SELECT MIN(seq) FROM transacoes_log)"
+                )
+                nova_seq, menor_seq = cursor.fetchone()
+                if menor_seq is not None and desde_seq < menor_seq - 1:
+                    return nova_seq, None, None
+                cursor.execute(
+                    "SELECT DISTINCT transacao_id FROM transacoes_log WHERE seq > ? AND seq <= ? AND usuario_id = ?",
+                    (desde_seq, nova_seq, usuario_id),
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+                alteradas = []
+                cursor.row_factory = Transacao.row_factory
+                for lote in self._em_lotes(ids):
+                    marcadores = ", ".join("?" * len(lote))
+                    cursor.execute(
+                        f"SELECT {Transacao.COLUNAS} FROM transacoes WHERE id IN ({marcadores}) AND usuario_id = ?",
+                        (*lote, usuario_id),
+                    )
+                    alteradas.extend(cursor.fetchall())
+                presentes = {t.id for t in alteradas}
+                removidas = [tid for tid in ids if tid not in presentes]
+                return nova_seq, alteradas, removidas
+        except Exception as e:
+            print(f"Erro ao buscar alterações: {e}")
+            return desde_seq, [], []
+
+    # --- Recorrências ---
+    def inserir_recorrencia(self, descricao, valor, tipo, categoria, frequencia, intervalo, data_inicio, usuario_id, data_fim=None):
+        """Cria regra (mensal, semanal ou a cada N dias); devolve o id ou None"""
+        if frequencia not in FREQUENCIAS:
+            print(f"Frequência inválida: {frequencia}")
+            return None
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    INSERT INTO recorrencias (descricao, valor, tipo, categoria, frequencia, intervalo, data_inicio, data_fim, usuario_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (descricao, valor, tipo, categoria, frequencia, intervalo,
+                     para_data(data_inicio).isoformat(),
+                     para_data(data_fim).isoformat() if data_fim else None, usuario_id),
+                )
+                conn.commit()
+                return cursor.lastrowid
+        except Exception as e:
+            print(f"Erro ao inserir recorrência: {e}")
+            return None
+
+    def buscar_recorrencias(self, usuario_id):
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT id, descricao, valor, tipo, categoria, frequencia, intervalo, data_inicio, data_fim, gerada_ate
+                    FROM recorrencias WHERE usuario_id = ? ORDER BY id
+                    """,
+                    (usuario_id,),
+                )
+                return cursor.fetchall()
+        except Exception as e:
+            print(f"Erro ao buscar recorrências: {e}")
+            return []
+
+    def encerrar_recorrencia(self, recorrencia_id, data_fim):
+        """Define a data final (ex.: assinatura cancelada); nada é gerado depois dela"""
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "UPDATE recorrencias SET data_fim = ? WHERE id = ?",
+                    (para_data(data_fim).isoformat(), recorrencia_id),
+                )
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Erro ao encerrar recorrência: {e}")
+            return False
+
+    def excluir_recorrencia(self, recorrencia_id):
+        """Remove a regra; transações já geradas continuam"""
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM recorrencias_geradas WHERE recorrencia_id = ?", (recorrencia_id,))
+                cursor.execute("DELETE FROM recorrencias WHERE id = ?", (recorrencia_id,))
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Erro ao excluir recorrência: {e}")
+            return False
+
+    def materializar_recorrencias(self, usuario_id, ate):
+        """Gera em transacoes as ocorrências vencidas até 'ate' (uma transação; idempotente). Devolve quantas"""
+        ate = para_data(ate)
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT id, descricao, valor, tipo, categoria, frequencia, intervalo, data_inicio, data_fim, gerada_ate
+                    FROM recorrencias
+                    WHERE usuario_id = ? AND data_inicio <= ? AND (gerada_ate IS NULL OR gerada_ate < ?)
+                    """,
+                    (usuario_id, ate.isoformat(), ate.isoformat()),
+                )
+                regras = cursor.fetchall()
+                geradas = 0
+                novas = []
+                for rid, descricao, valor, tipo, categoria, freq, intervalo, inicio, fim, gerada_ate in regras:
+                    desde = para_data(gerada_ate) + timedelta(days=1) if gerada_ate else inicio
+                    for vencimento in ocorrencias(freq, intervalo, inicio, fim, desde, ate):
+                        cursor.execute(
+                            "INSERT OR IGNORE INTO recorrencias_geradas (recorrencia_id, data_vencimento) VALUES (?, ?)",
+                            (rid, vencimento.isoformat()),
+                        )
+                        if cursor.rowcount != 1:
+                            continue
+                        cursor.execute(
+                            "INSERT INTO transacoes (descricao, valor, tipo, categoria, data, usuario_id) VALUES (?, ?, ?, ?, ?, ?)",
+                            (descricao, valor, tipo, categoria, vencimento.isoformat(), usuario_id),
+                        )
+                        cursor.execute(
+                            "UPDATE recorrencias_geradas SET transacao_id = ? WHERE recorrencia_id = ? AND data_vencimento = ?",
+                            (cursor.lastrowid, rid, vencimento.isoformat()),
+                        )
+                        novas.append((usuario_id, valor, tipo, categoria, vencimento.isoformat()))
+                        geradas += 1
+                    cursor.execute(
+                        "UPDATE recorrencias SET gerada_ate = ? WHERE id = ? AND (gerada_ate IS NULL OR gerada_ate < ?)",
+                        (ate.isoformat(), rid, ate.isoformat()),
+                    )
+                alertas = self._avaliar_orcamentos(cursor, novas)
+                conn.commit()
+            self._notificar_orcamento(alertas)
+            return geradas
+        except Exception as e:
+            print(f"Erro ao materializar recorrências: {e}")
+            return 0
+
+    def projetar_recorrencias(self, usuario_id, ate):
+        """Ocorrências futuras (após o já gerado) até 'ate', sem gravar: [(data, descricao, valor com sinal)]"""
+        projecao = []
+        for _, descricao, valor, tipo, _, freq, intervalo, inicio, fim, gerada_ate in self.buscar_recorrencias(usuario_id):
+            desde = para_data(gerada_ate) + timedelta(days=1) if gerada_ate else inicio
+            sinal = 1 if tipo == 'receita' else -1
+            for vencimento in ocorrencias(freq, intervalo, inicio, fim, desde, ate):
+                projecao.append((vencimento, descricao, sinal * valor))
+        projecao.sort(key=lambda p: p[0])
+        return projecao
+
+    # --- Orçamentos ---
+    def definir_orcamento(self, usuario_id, categoria, limite):
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    INSERT INTO orcamentos (usuario_id, categoria, limite) VALUES (?, ?, ?)
+                    ON CONFLICT (usuario_id, categoria) DO UPDATE SET limite = excluded.limite
+                    """,
+                    (usuario_id, categoria, limite),
+                )
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Erro ao definir orçamento: {e}")
+            return False
+
+    def excluir_orcamento(self, usuario_id, categoria):
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "DELETE FROM orcamentos WHERE usuario_id = ? AND categoria = ?",
+                    (usuario_id, categoria),
+                )
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Erro ao excluir orçamento: {e}")
+            return False
+
+    def buscar_orcamento_vs_real(self, usuario_id, mes):
+        """[(categoria, limite, gasto)] do mês 'AAAA-MM', lido dos contadores mantidos"""
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT o.categoria, o.limite, COALESCE(g.total, 0)
+                    FROM orcamentos o
+                    LEFT JOIN gastos_mensais g
+                      ON g.usuario_id = o.usuario_id AND g.mes = ? AND g.categoria = o.categoria
+                    WHERE o.usuario_id = ?
+                    ORDER BY o.categoria
+                    """,
+                    (mes, usuario_id),
+                )
+                return cursor.fetchall()
+        except Exception as e:
+            print(f"Erro ao buscar orçamentos: {e}")
+            return []
+
+    def _linhas_orcamento(self, cursor, transacao_ids):
+        """(usuario_id, valor, tipo, categoria, data) das transações, para comparar antes/depois de um UPDATE"""
+        linhas = []
+        for lote in self._em_lotes(transacao_ids):
+            marcadores = ", ".join("?" * len(lote))
+            cursor.execute(
+                f"SELECT usuario_id, valor, tipo, categoria, data FROM transacoes WHERE id IN ({marcadores})",
+                lote,
+            )
+            linhas.extend(cursor.fetchall())
+        return linhas
+
+    def _avaliar_orcamentos(self, cursor, novas, antigas=()):
+        """Compara o gasto do mês antes/depois da gravação com os limites.
+
+        novas/antigas: (usuario_id, valor, tipo, categoria, data) depois/antes da gravação.
+        Os contadores já foram atualizados pelos triggers; só lê por chave, sem varrer o mês.
+        """
+        delta = {}
+        for linhas, sinal in ((novas, 1), (antigas, -1)):
+            for usuario_id, valor, tipo, categoria, data in linhas:
+                if tipo == 'despesa' and usuario_id is not None:
+                    chave = (usuario_id, str(data)[:7], categoria)
+                    delta[chave] = delta.get(chave, 0.0) + sinal * valor
+        alertas = []
+        for (usuario_id, mes, categoria), valor in delta.items():
+            if valor <= 0:
+                continue
+            cursor.execute(
+                """
+                SELECT o.limite, COALESCE(g.total, 0)
+                FROM orcamentos o
+                LEFT JOIN gastos_mensais g
+                  ON g.usuario_id = o.usuario_id AND g.mes = ? AND g.categoria = o.categoria
+                WHERE o.usuario_id = ? AND o.categoria = ?
+                """,
+                (mes, usuario_id, categoria),
+            )
+            row = cursor.fetchone()
+            if not row:
+                continue
+            limite, total = row
+            antes = total - valor
+            cruzados = [l for l in LIMIARES_ORCAMENTO if antes < limite * l <= total]
+            if cruzados:
+                alertas.append(AlertaOrcamento(usuario_id, categoria, mes, total, limite, max(cruzados)))
+        return alertas
+
+    def adicionar_ouvinte_orcamento(self, ouvinte):
+        """Registra o callback e entrega os alertas gerados antes dele existir (ex.: pré-carregamento)"""
+        with self._trava_orcamento:
+            self.ouvintes_orcamento.append(ouvinte)
+            pendentes, self.alertas_pendentes = self.alertas_pendentes, []
+        if pendentes:
+            ouvinte(pendentes)
+
+    def remover_ouvinte_orcamento(self, ouvinte):
+        with self._trava_orcamento:
+            if ouvinte in self.ouvintes_orcamento:
+                self.ouvintes_orcamento.remove(ouvinte)
 
+    def _notificar_orcamento(self, alertas):
+        if not alertas:
+            return
+        # Checar e guardar sob a trava: senão um ouvinte registrado no meio perde o alerta
+        with self._trava_orcamento:
+            if not self.ouvintes_orcamento:
+                self.alertas_pendentes.extend(alertas)
+                return
+            ouvintes = list(self.ouvintes_orcamento)
+        for ouvinte in ouvintes:
+            try:
+                ouvinte(alertas)
+            except Exception as e:
+                print(f"Erro ao notificar alerta de orçamento: {e}")
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import time
+
+# Páginas liberadas por passo de incremental_vacuum (checa o orçamento entre passos)
+PASSO_VACUUM = 64
+# Linhas amostradas por índice no ANALYZE (mantém o custo limitado em bancos grandes)
+LIMITE_ANALISE = 400
+# Fator de variação no número de linhas que torna as estatísticas velhas
+FATOR_STATS_VELHAS = 2
+# Intervalo mínimo entre execuções automáticas (s)
+INTERVALO_MINIMO_S = 300
+
+
+class ManutencaoBanco:
+    """Manutenção do SQLite em etapas curtas: estatísticas, vacuum incremental e checkpoint do WAL"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.ultima_execucao = None
+        self.ultimo_relatorio = None
+
+    def devida(self):
+        return self.ultima_execucao is None or time.monotonic() - self.ultima_execucao >= INTERVALO_MINIMO_S
+
+    def conversao_pendente(self):
+        """True se o banco ainda não está em auto_vacuum=INCREMENTAL (precisa de um VACUUM completo)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                return conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Erro ao consultar auto_vacuum: {e}")
+            return False
+
+    def executar(self, orcamento_ms: int = 200, permitir_conversao: bool = False):
+        """Roda as etapas até estourar o orçamento; devolve o relatório (dict) ou None em erro.
+
+        permitir_conversao: faz o VACUUM completo (sem orçamento) que converte bancos antigos para
+        auto_vacuum=INCREMENTAL; só deve ser pedido ao fechar, nunca durante o uso.
+        """
+        inicio = time.perf_counter()
+        prazo = inicio + orcamento_ms / 1000
+        relatorio = {"etapas": [], "paginas_liberadas": 0, "bytes_liberados": 0, "wal_bytes_liberados": 0, "tempo_ms": 0.0}
+        try:
+            # Espera por locks também conta no orçamento
+            conn = sqlite3.connect(self.db_path, timeout=orcamento_ms / 1000, isolation_level=None)
+            try:
+                cursor = conn.cursor()
+                page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+
+                # 0) Conversão única de bancos antigos para auto_vacuum=INCREMENTAL
+                if permitir_conversao and cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    print("Convertendo banco para auto_vacuum incremental (uma única vez)...")
+                    # Em WAL o VACUUM só chega ao arquivo no checkpoint; page_count já vê o tamanho novo
+                    paginas_antes = cursor.execute("PRAGMA page_count").fetchone()[0]
+                    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    cursor.execute("VACUUM")
+                    paginas_depois = cursor.execute("PRAGMA page_count").fetchone()[0]
+                    relatorio["bytes_liberados"] += (paginas_antes - paginas_depois) * page_size
+                    relatorio["etapas"].append("vacuum_conversao")
+
+                # 1) Estatísticas do planejador. PRAGMA optimize numa conexão nova não olha
+                # tabela nenhuma antes do SQLite 3.46, então comparamos as contagens com sqlite_stat1
+                cursor.execute(f"PRAGMA analysis_limit = {LIMITE_ANALISE}")
+                for tabela in self._tabelas_com_stats_velhas(cursor, prazo):
+                    if time.perf_counter() >= prazo:
+                        break
+                    cursor.execute(f'ANALYZE "{tabela}"')
+                    relatorio["etapas"].append(f"analyze_{tabela}")
+
+                # 2) Devolve páginas livres ao sistema (só com auto_vacuum=INCREMENTAL)
+                if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                    livres_antes = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+                    livres = livres_antes
+                    while livres and time.perf_counter() < prazo:
+                        cursor.execute(f"PRAGMA incremental_vacuum({PASSO_VACUUM})").fetchall()
+                        livres = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+                    relatorio["paginas_liberadas"] = livres_antes - livres
+                    relatorio["bytes_liberados"] += (livres_antes - livres) * page_size
+                    relatorio["etapas"].append("incremental_vacuum")
+
+                # 3) Checkpoint do WAL; TRUNCATE só se ainda houver tempo (pode esperar leitores)
+                if cursor.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+                    wal_antes = self._tamanho_wal()
+                    modo = "TRUNCATE" if time.perf_counter() < prazo else "PASSIVE"
+                    cursor.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+                    relatorio["wal_bytes_liberados"] = wal_antes - self._tamanho_wal()
+                    relatorio["etapas"].append(f"wal_checkpoint_{modo.lower()}")
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Erro na manutenção do banco: {e}")
+            return None
+        relatorio["tempo_ms"] = (time.perf_counter() - inicio) * 1000
+        self.ultima_execucao = time.monotonic()
+        self.ultimo_relatorio = relatorio
+        return relatorio
+
+    def _tamanho_wal(self):
+        try:
+            return os.path.getsize(self.db_path + "-wal")
+        except OSError:
+            return 0
+
+    def _tabelas_com_stats_velhas(self, cursor, prazo):
+        tem_stats = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone()
+        estimadas = {}
+        if tem_stats:
+            for tabela, stat in cursor.execute("SELECT tbl, stat FROM sqlite_stat1").fetchall():
+                linhas = int(stat.split(" ", 1)[0])
+                estimadas[tabela] = max(estimadas.get(tabela, 0), linhas)
+        tabelas = cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        velhas = []
+        for tabela, sql in tabelas:
+            if time.perf_counter() >= prazo:
+                break
+            antigas = estimadas.get(tabela)
+            if antigas is None:
+                if cursor.execute(f'SELECT 1 FROM "{tabela}" LIMIT 1').fetchone():
+                    velhas.append(tabela)
+                continue
+            atuais = self._estimar_linhas(cursor, tabela, sql, antigas * FATOR_STATS_VELHAS + 1)
+            if atuais > antigas * FATOR_STATS_VELHAS or atuais * FATOR_STATS_VELHAS < antigas:
+                velhas.append(tabela)
+        return velhas
+
+    def _estimar_linhas(self, cursor, tabela, sql, teto):
+        """Número de linhas aproximado sem COUNT(*) completo"""
+        if "WITHOUT ROWID" in sql.upper():
+            # Sem rowid: conta só até o teto que já basta para decidir
+            return cursor.execute(f'SELECT COUNT(*) FROM (SELECT 1 FROM "{tabela}" LIMIT ?)', (teto,)).fetchone()[0]
+        # Faixa de rowids: duas buscas no índice; superestima após exclusões, o que basta aqui
+        menor, maior = cursor.execute(
+            f'SELECT (SELECT MIN(rowid) FROM "{tabela}"), (SELECT MAX(rowid) FROM "{tabela}")'
+        ).fetchone()
+        return 0 if maior is None else maior - menor + 1
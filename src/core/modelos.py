@@ -0,0 +1,103 @@
+import sys
+from array import array
+
+
+class Transacao:
+    """Registro tipado de transação (só as colunas exibidas)"""
+
+    __slots__ = ("id", "descricao", "valor", "tipo", "categoria", "data")
+
+    # Ordem das colunas no SELECT; manter em sincronia com __slots__
+    COLUNAS = "id, descricao, valor, tipo, categoria, data"
+
+    def __init__(self, id, descricao, valor, tipo, categoria, data):
+        self.id = id
+        self.descricao = descricao
+        self.valor = valor
+        self.tipo = tipo
+        self.categoria = categoria
+        self.data = data
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """Uso: cursor.row_factory = Transacao.row_factory"""
+        return cls(*row)
+
+    def como_tupla(self):
+        return (self.id, self.descricao, self.valor, self.tipo, self.categoria, self.data)
+
+    def __eq__(self, outro):
+        return isinstance(outro, Transacao) and self.como_tupla() == outro.como_tupla()
+
+    def __hash__(self):
+        return hash(self.como_tupla())
+
+    def __repr__(self):
+        return f"Transacao({self.id}, {self.descricao!r}, {self.valor}, {self.tipo!r}, {self.categoria!r}, {self.data!r})"
+
+
+class LoteTransacoes:
+    """Lote colunar (arrays) para totais e análises sobre muitas transações"""
+
+    __slots__ = ("ids", "valores", "tipos", "categorias", "datas")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.valores = array("d")
+        # tipo/categoria se repetem muito: strings internadas
+        self.tipos = []
+        self.categorias = []
+        self.datas = []
+
+    @classmethod
+    def de_linhas(cls, linhas):
+        """Monta a partir de (id, valor, tipo, categoria, data)"""
+        lote = cls()
+        for tid, valor, tipo, categoria, data in linhas:
+            lote.ids.append(tid)
+            lote.valores.append(valor)
+            lote.tipos.append(sys.intern(tipo))
+            lote.categorias.append(sys.intern(categoria))
+            lote.datas.append(data)
+        return lote
+
+    @classmethod
+    def de_transacoes(cls, transacoes):
+        return cls.de_linhas((t.id, t.valor, t.tipo, t.categoria, t.data) for t in transacoes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def contagem(self, tipo):
+        return self.tipos.count(tipo)
+
+    def total(self, tipo):
+        return sum(v for v, t in zip(self.valores, self.tipos) if t == tipo)
+
+    def total_por_categoria(self, tipo):
+        totais = {}
+        for v, t, c in zip(self.valores, self.tipos, self.categorias):
+            if t == tipo:
+                totais[c] = totais.get(c, 0.0) + v
+        return totais
+
+
+class AlertaOrcamento:
+    """Evento de limiar de orçamento cruzado por uma gravação"""
+
+    __slots__ = ("usuario_id", "categoria", "mes", "total", "limite", "limiar")
+
+    def __init__(self, usuario_id, categoria, mes, total, limite, limiar):
+        self.usuario_id = usuario_id
+        self.categoria = categoria
+        self.mes = mes
+        self.total = total
+        self.limite = limite
+        self.limiar = limiar
+
+    @property
+    def estourou(self):
+        return self.limiar >= 1.0
+
+    def __repr__(self):
+        return f"AlertaOrcamento({self.usuario_id}, {self.categoria!r}, {self.mes!r}, {self.total}, {self.limite}, {self.limiar})"
@@ -0,0 +1,50 @@
+import calendar
+from datetime import date, timedelta
+
+FREQUENCIAS = ("mensal", "semanal", "dias")
+
+
+def para_data(valor):
+    """Aceita date ou texto ISO (como o SQLite devolve)"""
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def somar_meses(inicio: date, meses: int) -> date:
+    """Soma meses mantendo o dia (limitado ao último dia do mês)"""
+    total = inicio.month - 1 + meses
+    ano, mes = inicio.year + total // 12, total % 12 + 1
+    dia = min(inicio.day, calendar.monthrange(ano, mes)[1])
+    return date(ano, mes, dia)
+
+
+def ocorrencias(frequencia, intervalo, data_inicio, data_fim, desde, ate):
+    """Datas de vencimento da regra dentro de [desde, ate], sem varrer desde o início"""
+    inicio = para_data(data_inicio)
+    desde = max(para_data(desde), inicio)
+    ate = para_data(ate)
+    if data_fim:
+        ate = min(ate, para_data(data_fim))
+    intervalo = max(int(intervalo or 1), 1)
+    if desde > ate:
+        return []
+
+    datas = []
+    if frequencia == "mensal":
+        meses = (desde.year - inicio.year) * 12 + desde.month - inicio.month
+        k = max(meses // intervalo, 0)
+        atual = somar_meses(inicio, k * intervalo)
+        while atual <= ate:
+            if atual >= desde:
+                datas.append(atual)
+            k += 1
+            atual = somar_meses(inicio, k * intervalo)
+    else:
+        passo = timedelta(days=intervalo * (7 if frequencia == "semanal" else 1))
+        k = -(-(desde - inicio).days // passo.days)
+        atual = inicio + k * passo
+        while atual <= ate:
+            datas.append(atual)
+            atual += passo
+    return datas
@@ -0,0 +1,38 @@
+import os
+
+from .db import APP_DIR
+
+# Token "lembrar de mim" guardado localmente; o banco só guarda o hash
+DEFAULT_SESSAO_PATH = os.path.join(APP_DIR, "sessao.token")
+
+
+def ler_token(caminho: str = None):
+    try:
+        with open(caminho or DEFAULT_SESSAO_PATH, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Erro ao ler sessão: {e}")
+        return None
+
+
+def salvar_token(token: str, caminho: str = None):
+    caminho = caminho or DEFAULT_SESSAO_PATH
+    try:
+        fd = os.open(caminho, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(token)
+        return True
+    except Exception as e:
+        print(f"Erro ao salvar sessão: {e}")
+        return False
+
+
+def apagar_token(caminho: str = None):
+    try:
+        os.remove(caminho or DEFAULT_SESSAO_PATH)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Erro ao apagar sessão: {e}")
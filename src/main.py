@@ -1,11 +1,14 @@
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import QApplication, QStackedWidget, QMessageBox
 from PyQt5.QtGui import QPalette, QColor
 
 from .core.db import DatabaseManager
+from .core import sessao
 from .ui.login import LoginWindow
 from .ui.signup import SignupWindow
 from .ui.dashboard import DashboardWindow
+from .monitor import MonitorResponsividade
 
 
 class MainApplication:
@@ -13,6 +16,9 @@ class MainApplication:
 
     def __init__(self):
         self.app = QApplication(sys.argv)
+        self.monitor = MonitorResponsividade.do_ambiente()
+        if self.monitor:
+            self.instrumentar(self.monitor)
         self.db_manager = DatabaseManager()
 
         self.app.setStyle('Fusion')
@@ -27,13 +33,46 @@ class MainApplication:
         self.signup_window = SignupWindow(self.db_manager)
 
         self.login_window.show_signup.connect(self.mostrar_signup)
-        self.login_window.login_successful.connect(self.abrir_dashboard)
+        self.login_window.login_successful.connect(self.ao_login)
         self.signup_window.show_login.connect(self.mostrar_login)
         self.signup_window.signup_successful.connect(self.mostrar_login)
 
         self.stacked_widget.addWidget(self.login_window)
         self.stacked_widget.addWidget(self.signup_window)
-        self.stacked_widget.show()
+
+        # Sessão lembrada: pula o PBKDF2 e vai direto ao dashboard
+        self.token_sessao = sessao.ler_token()
+        resultado = self.db_manager.validar_sessao(self.token_sessao)
+        if resultado:
+            self.abrir_dashboard(*resultado)
+        else:
+            if self.token_sessao:
+                sessao.apagar_token()
+                self.token_sessao = None
+            self.stacked_widget.show()
+
+    def instrumentar(self, monitor):
+        """Modo diagnóstico (FINANCAS_MONITOR=1): cronometra handlers, SQLite, PBKDF2 e construção de widgets"""
+        monitor.instrumentar(
+            DatabaseManager,
+            "init_database", "_hash_password", "_verify_password", "inserir_usuario", "verificar_login",
+            "criar_sessao", "validar_sessao",
+            "inserir_transacao", "buscar_transacoes", "atualizar_transacao", "excluir_transacao",
+            "inserir_transacoes", "atualizar_transacoes", "recategorizar_transacoes", "excluir_transacoes",
+            "restaurar_transacoes", "restaurar_categorias", "buscar_alteracoes", "materializar_recorrencias", "projetar_recorrencias",
+            "buscar_orcamento_vs_real",
+        )
+        monitor.instrumentar(LoginWindow, "setup_ui", "fazer_login", slots=True)
+        monitor.instrumentar(SignupWindow, "setup_ui", "criar_conta", slots=True)
+        monitor.instrumentar(
+            DashboardWindow,
+            "setup_ui", "carregar_dados", "aplicar_pre_carregamento", "verificar_alteracoes", "exibir_transacoes", "atualizar_tabela_transacoes",
+            "salvar_transacao", "recategorizar_selecionadas", "excluir_selecionadas", "desfazer_ultima_acao",
+            slots=True,
+        )
+        monitor.instrumentar(MainApplication, "abrir_dashboard", slots=True)
+        monitor.iniciar()
+        self.app.aboutToQuit.connect(monitor.finalizar)
 
     def mostrar_signup(self):
         self.stacked_widget.setCurrentIndex(1)
@@ -45,14 +84,35 @@ class MainApplication:
         self.signup_window.senha_input.clear()
         self.signup_window.confirmar_senha_input.clear()
 
+    def ao_login(self, user_id, nome):
+        if self.token_sessao:
+            self.db_manager.revogar_sessao(self.token_sessao)
+            sessao.apagar_token()
+            self.token_sessao = None
+        if self.login_window.lembrar_check.isChecked():
+            self.token_sessao = self.db_manager.criar_sessao(user_id)
+            if self.token_sessao:
+                sessao.salvar_token(self.token_sessao)
+        self.abrir_dashboard(user_id, nome)
+
     def abrir_dashboard(self, user_id, nome):
         try:
             self.stacked_widget.hide()
-            self.dashboard_window = DashboardWindow(user_id, nome, self.db_manager)
+            # Busca os dados em segundo plano enquanto os widgets são montados
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                pre_carregamento = executor.submit(self.db_manager.carregar_painel, user_id)
+                self.dashboard_window = DashboardWindow(user_id, nome, self.db_manager, pre_carregamento)
+            self.dashboard_window.logout_requested.connect(self.logout)
             self.dashboard_window.show()
         except Exception:
             QMessageBox.critical(self.login_window, "Erro", "Erro ao abrir dashboard!")
 
+    def logout(self):
+        if self.token_sessao:
+            self.db_manager.revogar_sessao(self.token_sessao)
+            sessao.apagar_token()
+            self.token_sessao = None
+
     def run(self):
         return self.app.exec()
 
@@ -0,0 +1,150 @@
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from PyQt5.QtCore import QTimer
+
+from .core.db import APP_DIR
+
+# Ativação (opt-in) por variáveis de ambiente
+ENV_MONITOR = "FINANCAS_MONITOR"          # "1" liga o monitor
+ENV_PROFILE = "FINANCAS_PROFILE"          # N > 0: perfila 1 a cada N chamadas de handler
+DEFAULT_RELATORIO = os.path.join(APP_DIR, "financas_monitor.log")
+
+INTERVALO_HEARTBEAT_MS = 50
+LIMITE_TRAVAMENTO_MS = 200
+# Janela dos percentis: ~10 min de heartbeats (o máximo vale para a sessão toda)
+JANELA_LATENCIAS = 12_000
+
+
+class MonitorResponsividade:
+    """Mede a latência do event loop e registra seções bloqueantes (opt-in)"""
+
+    def __init__(self, caminho=DEFAULT_RELATORIO, amostra_profile=0):
+        self.caminho = caminho
+        self.amostra_profile = amostra_profile
+        self.pilha = []
+        self.concluidas = deque(maxlen=64)
+        self.ticks = 0
+        self.ultimo_tick = None
+        self.latencias = deque(maxlen=JANELA_LATENCIAS)
+        self.maior_latencia = 0.0
+        self.chamadas = {}
+        self.timer = None
+
+    @classmethod
+    def do_ambiente(cls):
+        """Cria o monitor se FINANCAS_MONITOR=1; senão None"""
+        if os.environ.get(ENV_MONITOR) != "1":
+            return None
+        try:
+            amostra = int(os.environ.get(ENV_PROFILE, "0"))
+        except ValueError:
+            amostra = 0
+        return cls(amostra_profile=amostra)
+
+    # --- Relatório ---
+    def registrar(self, texto):
+        try:
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(f"[{datetime.now().isoformat(timespec='milliseconds')}] {texto}\n")
+        except Exception as e:
+            print(f"Erro ao gravar relatório do monitor: {e}")
+
+    # --- Heartbeat ---
+    def iniciar(self, parent=None):
+        self.registrar(f"Monitor iniciado (heartbeat {INTERVALO_HEARTBEAT_MS}ms, limite {LIMITE_TRAVAMENTO_MS}ms, profile 1/{self.amostra_profile or '-'})")
+        self.ultimo_tick = time.perf_counter()
+        self.timer = QTimer(parent)
+        self.timer.timeout.connect(self._tick)
+        self.timer.start(INTERVALO_HEARTBEAT_MS)
+
+    def _tick(self):
+        agora = time.perf_counter()
+        atraso_ms = (agora - self.ultimo_tick) * 1000 - INTERVALO_HEARTBEAT_MS
+        self.latencias.append(max(atraso_ms, 0.0))
+        self.maior_latencia = max(self.maior_latencia, atraso_ms)
+        if atraso_ms > LIMITE_TRAVAMENTO_MS:
+            no_intervalo = [
+                f"{nome} ({(fim - inicio) * 1000:.0f}ms)"
+                for nome, inicio, fim in self.concluidas if fim >= self.ultimo_tick
+            ]
+            ativas = " > ".join(self.pilha) or "-"
+            self.registrar(
+                f"TRAVAMENTO event loop parado {atraso_ms:.0f}ms; ativas: {ativas}; "
+                f"concluídas no intervalo: {', '.join(no_intervalo) or '-'}"
+            )
+        self.ultimo_tick = agora
+        self.ticks += 1
+
+    def finalizar(self):
+        if self.timer:
+            self.timer.stop()
+        if self.latencias:
+            ordenadas = sorted(self.latencias)
+            p50 = ordenadas[len(ordenadas) // 2]
+            p99 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.99))]
+            self.registrar(
+                f"Resumo latência event loop: p50={p50:.1f}ms p99={p99:.1f}ms (últimos {len(ordenadas)} ticks); "
+                f"max={self.maior_latencia:.1f}ms em {self.ticks} ticks"
+            )
+
+    # --- Seções ---
+    def instrumentar(self, classe, *nomes, slots=False):
+        """Substitui os métodos da classe por versões cronometradas (antes de criar instâncias).
+
+        slots=True só para classes cujos métodos são ligados a sinais do Qt: aí os argumentos
+        extras do sinal são descartados; nas demais uma chamada errada continua dando TypeError.
+        """
+        for nome in nomes:
+            original = getattr(classe, nome)
+            setattr(classe, nome, self._envolver(f"{classe.__name__}.{nome}", original, slots))
+
+    def _envolver(self, nome, func, slots=False):
+        # Sinais do Qt (ex.: clicked) passam argumentos extras; corta para o que a função aceita
+        params = inspect.signature(func).parameters.values()
+        if not slots or any(p.kind == p.VAR_POSITIONAL for p in params):
+            max_args = None
+        else:
+            max_args = len([p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)])
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if max_args is not None:
+                args = args[:max_args]
+            # Só a thread da GUI trava o event loop (ex.: pré-carregamento roda em outra)
+            if threading.current_thread() is not threading.main_thread():
+                return func(*args, **kwargs)
+            profiler = None
+            if not self.pilha and self.amostra_profile > 0:
+                self.chamadas[nome] = self.chamadas.get(nome, 0) + 1
+                if (self.chamadas[nome] - 1) % self.amostra_profile == 0:
+                    profiler = cProfile.Profile()
+            self.pilha.append(nome)
+            ticks_antes = self.ticks
+            inicio = time.perf_counter()
+            try:
+                if profiler:
+                    return profiler.runcall(func, *args, **kwargs)
+                return func(*args, **kwargs)
+            finally:
+                fim = time.perf_counter()
+                self.pilha.pop()
+                self.concluidas.append((nome, inicio, fim))
+                duracao_ms = (fim - inicio) * 1000
+                # Se o heartbeat rodou no meio (diálogo modal), a seção não bloqueou o tempo todo
+                if duracao_ms > LIMITE_TRAVAMENTO_MS and self.ticks == ticks_antes:
+                    origem = " > ".join(self.pilha + [nome])
+                    self.registrar(f"BLOQUEIO {duracao_ms:.0f}ms em {origem}")
+                    if profiler:
+                        saida = io.StringIO()
+                        pstats.Stats(profiler, stream=saida).sort_stats("cumulative").print_stats(15)
+                        self.registrar(f"PROFILE {nome}\n{saida.getvalue()}")
+        return wrapper
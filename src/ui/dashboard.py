@@ -1,23 +1,74 @@
+from datetime import date, timedelta
+
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
-    QTableWidgetItem, QComboBox, QDateEdit, QLineEdit, QMessageBox
+    QTableWidgetItem, QComboBox, QDateEdit, QLineEdit, QMessageBox,
+    QAbstractItemView, QInputDialog, QSpinBox, QCheckBox
 )
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 
+from ..core.modelos import LoteTransacoes
 from .widgets import SimpleButton, SimpleCard
 
 
+# Intervalo de verificação de alterações feitas por outras instâncias (ms)
+INTERVALO_MONITOR_MS = 1500
+# Acima disto (ex.: importação em massa) recarregar tudo sai mais barato que mexer linha a linha
+LIMITE_ALTERACOES_INCREMENTAIS = 200
+
+# Verificação periódica da manutenção do banco (ms) e orçamentos de tempo (ms)
+INTERVALO_MANUTENCAO_MS = 60_000
+ORCAMENTO_MANUTENCAO_MS = 150
+ORCAMENTO_MANUTENCAO_SAIDA_MS = 1000
+
+# Opções do combo "Repetir" -> frequência da recorrência
+OPCOES_REPETICAO = {
+    "Não repetir": None,
+    "Mensal": "mensal",
+    "Semanal": "semanal",
+    "A cada N dias": "dias",
+}
+
+# Horizonte da projeção de saldo a partir das recorrências (dias)
+HORIZONTE_PROJECAO_DIAS = 90
+
+
 class DashboardWindow(QMainWindow):
     """Janela principal"""
 
-    def __init__(self, user_id, nome, db_manager):
+    logout_requested = pyqtSignal()
+    # Alertas podem vir da thread de pré-carregamento; o sinal entrega na thread da GUI
+    alertas_orcamento = pyqtSignal(list)
+
+    def __init__(self, user_id, nome, db_manager, pre_carregamento=None):
         super().__init__()
         self.user_id = user_id
         self.nome = nome
         self.db_manager = db_manager
+        self.transacoes = []
+        # id -> linha em self.transacoes/tabela (refeito após cada lote de alterações)
+        self.linha_por_id = {}
+        self.historico_desfazer = []
+        self.ultima_seq = 0
         self.setup_ui()
-        self.carregar_dados()
+        self.alertas_orcamento.connect(self.ao_alerta_orcamento)
+        self.ouvinte_orcamento = self.alertas_orcamento.emit
+        self.db_manager.adicionar_ouvinte_orcamento(self.ouvinte_orcamento)
+        self.atualizar_recorrencias()
+        if pre_carregamento is not None:
+            self.aplicar_pre_carregamento(pre_carregamento)
+        else:
+            self.carregar_dados()
+
+        self.db_manager.banco_alterado()
+        self.monitor_timer = QTimer(self)
+        self.monitor_timer.timeout.connect(self.verificar_alteracoes)
+        self.monitor_timer.start(INTERVALO_MONITOR_MS)
+
+        self.manutencao_timer = QTimer(self)
+        self.manutencao_timer.timeout.connect(self.executar_manutencao)
+        self.manutencao_timer.start(INTERVALO_MANUTENCAO_MS)
 
     def setup_ui(self):
         self.setWindowTitle(f"💰 Finanças Pessoais - {self.nome}")
@@ -62,7 +113,7 @@ class DashboardWindow(QMainWindow):
             QPushButton:hover { background-color: #c82333; }
             """
         )
-        logout_btn.clicked.connect(self.close)
+        logout_btn.clicked.connect(self.sair)
 
         header_layout.addWidget(title_label)
         header_layout.addStretch()
@@ -103,6 +154,26 @@ class DashboardWindow(QMainWindow):
         resumo_layout.addWidget(resumo_title)
         resumo_layout.addWidget(self.resumo_label)
         layout.addWidget(resumo_frame)
+
+        orcamento_frame = SimpleCard()
+        orcamento_layout = QVBoxLayout(orcamento_frame)
+
+        orcamento_header = QHBoxLayout()
+        orcamento_title = QLabel("🎯 Orçamentos do Mês")
+        orcamento_title.setFont(QFont("Segoe UI", 16, QFont.Weight.Bold))
+        orcamento_title.setStyleSheet("color: #333; margin-bottom: 20px;")
+        self.definir_orcamento_btn = SimpleButton("Definir Orçamento")
+        self.definir_orcamento_btn.clicked.connect(self.definir_orcamento)
+        orcamento_header.addWidget(orcamento_title)
+        orcamento_header.addStretch()
+        orcamento_header.addWidget(self.definir_orcamento_btn)
+
+        self.orcamento_label = QLabel("Nenhum orçamento definido")
+        self.orcamento_label.setStyleSheet("color: #666; font-size: 14px;")
+
+        orcamento_layout.addLayout(orcamento_header)
+        orcamento_layout.addWidget(self.orcamento_label)
+        layout.addWidget(orcamento_frame)
         return widget
 
     def criar_stats_card(self, titulo, valor, tipo):
@@ -149,6 +220,32 @@ class DashboardWindow(QMainWindow):
             """
         )
         actions_layout.addWidget(self.atualizar_btn)
+
+        self.recategorizar_btn = SimpleButton("🏷️ Recategorizar Selecionadas")
+        self.recategorizar_btn.clicked.connect(self.recategorizar_selecionadas)
+        actions_layout.addWidget(self.recategorizar_btn)
+
+        self.excluir_selecionadas_btn = SimpleButton("🗑️ Excluir Selecionadas")
+        self.excluir_selecionadas_btn.clicked.connect(self.excluir_selecionadas)
+        self.excluir_selecionadas_btn.setStyleSheet(
+            """
+            QPushButton { background-color: #dc3545; border: none; border-radius: 6px; color: white; padding: 8px 16px; font-weight: bold; }
+            QPushButton:hover { background-color: #c82333; }
+            """
+        )
+        actions_layout.addWidget(self.excluir_selecionadas_btn)
+
+        self.desfazer_btn = SimpleButton("↩️ Desfazer")
+        self.desfazer_btn.clicked.connect(self.desfazer_ultima_acao)
+        self.desfazer_btn.setEnabled(False)
+        self.desfazer_btn.setStyleSheet(
+            """
+            QPushButton { background-color: #6c757d; border: none; border-radius: 6px; color: white; padding: 8px 16px; font-weight: bold; }
+            QPushButton:hover { background-color: #5a6268; }
+            QPushButton:disabled { background-color: #c8cbcf; }
+            """
+        )
+        actions_layout.addWidget(self.desfazer_btn)
         actions_layout.addStretch()
         layout.addLayout(actions_layout)
 
@@ -157,6 +254,9 @@ class DashboardWindow(QMainWindow):
         self.transacoes_table.setHorizontalHeaderLabels([
             "Data", "Descrição", "Valor", "Tipo", "Categoria", "Editar", "Excluir"
         ])
+        self.transacoes_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.transacoes_table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.transacoes_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.transacoes_table.setStyleSheet(
             """
             QTableWidget { background: white; border: 1px solid #e1e5e9; border-radius: 6px; gridline-color: #f0f0f0; }
@@ -228,11 +328,47 @@ class DashboardWindow(QMainWindow):
         )
         form_layout.addWidget(self.data_input)
 
+        form_layout.addWidget(QLabel("🔁 Repetir:"))
+        repeticao_layout = QHBoxLayout()
+        self.repeticao_combo = QComboBox()
+        self.repeticao_combo.addItems(list(OPCOES_REPETICAO))
+        self.repeticao_combo.setStyleSheet(self.tipo_combo.styleSheet())
+        self.intervalo_input = QSpinBox()
+        self.intervalo_input.setRange(1, 365)
+        self.intervalo_input.setPrefix("a cada ")
+        self.data_fim_check = QCheckBox("Até:")
+        self.data_fim_input = QDateEdit()
+        self.data_fim_input.setDate(QDate.currentDate().addYears(1))
+        self.data_fim_input.setEnabled(False)
+        self.data_fim_check.toggled.connect(self.data_fim_input.setEnabled)
+        repeticao_layout.addWidget(self.repeticao_combo)
+        repeticao_layout.addWidget(self.intervalo_input)
+        repeticao_layout.addWidget(self.data_fim_check)
+        repeticao_layout.addWidget(self.data_fim_input)
+        form_layout.addLayout(repeticao_layout)
+
         self.salvar_btn = SimpleButton("💾 Salvar Transação")
         self.salvar_btn.clicked.connect(self.salvar_transacao)
         form_layout.addWidget(self.salvar_btn)
 
         layout.addWidget(form_frame)
+
+        recorrencias_frame = SimpleCard()
+        recorrencias_layout = QVBoxLayout(recorrencias_frame)
+        recorrencias_title = QLabel("🔁 Transações Recorrentes")
+        recorrencias_title.setFont(QFont("Segoe UI", 16, QFont.Weight.Bold))
+        recorrencias_title.setStyleSheet("color: #333; margin-bottom: 10px;")
+        recorrencias_layout.addWidget(recorrencias_title)
+
+        self.recorrencias_table = QTableWidget()
+        self.recorrencias_table.setColumnCount(6)
+        self.recorrencias_table.setHorizontalHeaderLabels([
+            "Descrição", "Valor", "Frequência", "Até", "Encerrar", "Excluir"
+        ])
+        self.recorrencias_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.recorrencias_table.setMinimumHeight(160)
+        recorrencias_layout.addWidget(self.recorrencias_table)
+        layout.addWidget(recorrencias_frame)
         layout.addStretch()
         return widget
 
@@ -252,9 +388,17 @@ class DashboardWindow(QMainWindow):
             except ValueError:
                 QMessageBox.warning(self, "Erro", "Valor inválido!")
                 return
-            if self.db_manager.inserir_transacao(descricao, valor, tipo, categoria, data, self.user_id):
+            frequencia = OPCOES_REPETICAO[self.repeticao_combo.currentText()]
+            if frequencia:
+                data_fim = self.data_fim_input.date().toPyDate() if self.data_fim_check.isChecked() else None
+                ok = self.db_manager.inserir_recorrencia(descricao, valor, tipo, categoria, frequencia, self.intervalo_input.value(), data, self.user_id, data_fim) is not None
+                self.atualizar_recorrencias()
+            else:
+                ok = self.db_manager.inserir_transacao(descricao, valor, tipo, categoria, data, self.user_id)
+            if ok:
                 QMessageBox.information(self, "Sucesso", "Transação salva com sucesso!")
                 self.descricao_input.clear(); self.valor_input.clear(); self.categoria_input.clear(); self.data_input.setDate(QDate.currentDate())
+                self.repeticao_combo.setCurrentIndex(0); self.intervalo_input.setValue(1); self.data_fim_check.setChecked(False)
                 self.carregar_dados()
             else:
                 QMessageBox.critical(self, "Erro", "Erro ao salvar transação!")
@@ -263,9 +407,91 @@ class DashboardWindow(QMainWindow):
 
     def carregar_dados(self):
         try:
-            transacoes = self.db_manager.buscar_transacoes(self.user_id)
-            receitas = sum(t[2] for t in transacoes if t[3] == 'receita')
-            despesas = sum(t[2] for t in transacoes if t[3] == 'despesa')
+            self.ultima_seq, transacoes = self.db_manager.carregar_painel(self.user_id, date.today())
+            self.exibir_transacoes(transacoes)
+        except Exception as e:
+            print(f"Erro ao carregar dados: {e}")
+
+    def aplicar_pre_carregamento(self, futuro):
+        """Usa o carregar_painel disparado em segundo plano enquanto os widgets eram montados"""
+        try:
+            self.ultima_seq, transacoes = futuro.result()
+            self.exibir_transacoes(transacoes)
+        except Exception as e:
+            print(f"Erro no pré-carregamento: {e}")
+            self.carregar_dados()
+
+    def sair(self):
+        self.logout_requested.emit()
+        self.close()
+
+    def verificar_alteracoes(self):
+        """Aplica só as linhas alteradas por outras conexões desde a última sequência vista"""
+        try:
+            if not self.db_manager.banco_alterado():
+                return
+            nova_seq, alteradas, removidas = self.db_manager.buscar_alteracoes(self.user_id, self.ultima_seq)
+            if alteradas is None:
+                # Log podado além do que esta janela viu: só uma recarga completa é confiável
+                self.carregar_dados()
+                return
+            self.ultima_seq = nova_seq
+            if not alteradas and not removidas:
+                return
+            if len(alteradas) + len(removidas) > LIMITE_ALTERACOES_INCREMENTAIS:
+                self.carregar_dados()
+                return
+            self.transacoes_table.setUpdatesEnabled(False)
+            try:
+                self.remover_linhas_transacoes(set(removidas) | {t.id for t in alteradas})
+                for t in alteradas:
+                    self.inserir_linha_transacao(t)
+            finally:
+                self.indexar_transacoes()
+                self.transacoes_table.setUpdatesEnabled(True)
+            self.atualizar_totais(self.transacoes)
+        except Exception as e:
+            print(f"Erro ao verificar alterações: {e}")
+
+    def remover_linhas_transacoes(self, ids):
+        # De baixo para cima: remover uma linha não desloca as de cima
+        linhas = sorted((self.linha_por_id[tid] for tid in ids if tid in self.linha_por_id), reverse=True)
+        for row in linhas:
+            del self.transacoes[row]
+            self.transacoes_table.removeRow(row)
+
+    def indexar_transacoes(self):
+        self.linha_por_id = {t.id: row for row, t in enumerate(self.transacoes)}
+
+    def inserir_linha_transacao(self, transacao):
+        """Insere mantendo a ordem por data decrescente (busca binária)"""
+        chave = str(transacao.data)
+        inicio, fim = 0, len(self.transacoes)
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            if str(self.transacoes[meio].data) >= chave:
+                inicio = meio + 1
+            else:
+                fim = meio
+        self.transacoes.insert(inicio, transacao)
+        self.transacoes_table.insertRow(inicio)
+        self.preencher_linha_transacao(inicio, transacao)
+
+    def exibir_transacoes(self, transacoes):
+        try:
+            self.transacoes = transacoes
+            self.indexar_transacoes()
+            self.atualizar_tabela_transacoes(transacoes)
+            self.atualizar_totais(transacoes)
+        except Exception as e:
+            print(f"Erro ao exibir transações: {e}")
+
+    def atualizar_totais(self, transacoes):
+        try:
+            # Uma passada monta as colunas; totais e contagens saem delas
+            lote = LoteTransacoes.de_transacoes(transacoes)
+            receitas = lote.total('receita')
+            despesas = lote.total('despesa')
             saldo = receitas - despesas
             saldo_label = self.saldo_card.findChild(QLabel, "value_label")
             receitas_label = self.receitas_card.findChild(QLabel, "value_label")
@@ -273,44 +499,47 @@ class DashboardWindow(QMainWindow):
             if saldo_label: saldo_label.setText(f"R$ {saldo:.2f}")
             if receitas_label: receitas_label.setText(f"R$ {receitas:.2f}")
             if despesas_label: despesas_label.setText(f"R$ {despesas:.2f}")
-            self.atualizar_tabela_transacoes(transacoes)
-            self.atualizar_resumo(transacoes)
+            self.atualizar_resumo(lote, saldo)
+            self.atualizar_orcamentos()
         except Exception as e:
-            print(f"Erro ao carregar dados: {e}")
+            print(f"Erro ao atualizar totais: {e}")
 
     def atualizar_tabela_transacoes(self, transacoes):
         try:
             self.transacoes_table.setRowCount(len(transacoes))
             for row, t in enumerate(transacoes):
-                self.transacoes_table.setItem(row, 0, QTableWidgetItem(str(t[5])))
-                self.transacoes_table.setItem(row, 1, QTableWidgetItem(t[1]))
-                self.transacoes_table.setItem(row, 2, QTableWidgetItem(f"R$ {t[2]:.2f}"))
-                self.transacoes_table.setItem(row, 3, QTableWidgetItem(t[3].title()))
-                self.transacoes_table.setItem(row, 4, QTableWidgetItem(t[4]))
-
-                editar_btn = SimpleButton("✏️"); editar_btn.setFixedSize(60, 30)
-                editar_btn.setStyleSheet("QPushButton{background-color:#ffc107;border:none;border-radius:4px;color:#333;font-weight:bold;} QPushButton:hover{background:#e0a800}")
-                editar_btn.clicked.connect(lambda checked, tx=t: self.editar_transacao(tx))
-                self.transacoes_table.setCellWidget(row, 5, editar_btn)
-
-                excluir_btn = SimpleButton("🗑️"); excluir_btn.setFixedSize(60, 30)
-                excluir_btn.setStyleSheet("QPushButton{background-color:#dc3545;border:none;border-radius:4px;color:white;font-weight:bold;} QPushButton:hover{background:#c82333}")
-                excluir_btn.clicked.connect(lambda checked, tx=t: self.excluir_transacao(tx))
-                self.transacoes_table.setCellWidget(row, 6, excluir_btn)
+                self.preencher_linha_transacao(row, t)
         except Exception as e:
             print(f"Erro ao atualizar tabela: {e}")
 
+    def preencher_linha_transacao(self, row, t):
+        self.transacoes_table.setItem(row, 0, QTableWidgetItem(str(t.data)))
+        self.transacoes_table.setItem(row, 1, QTableWidgetItem(t.descricao))
+        self.transacoes_table.setItem(row, 2, QTableWidgetItem(f"R$ {t.valor:.2f}"))
+        self.transacoes_table.setItem(row, 3, QTableWidgetItem(t.tipo.title()))
+        self.transacoes_table.setItem(row, 4, QTableWidgetItem(t.categoria))
+
+        editar_btn = SimpleButton("✏️"); editar_btn.setFixedSize(60, 30)
+        editar_btn.setStyleSheet("QPushButton{background-color:#ffc107;border:none;border-radius:4px;color:#333;font-weight:bold;} QPushButton:hover{background:#e0a800}")
+        editar_btn.clicked.connect(lambda checked, tx=t: self.editar_transacao(tx))
+        self.transacoes_table.setCellWidget(row, 5, editar_btn)
+
+        excluir_btn = SimpleButton("🗑️"); excluir_btn.setFixedSize(60, 30)
+        excluir_btn.setStyleSheet("QPushButton{background-color:#dc3545;border:none;border-radius:4px;color:white;font-weight:bold;} QPushButton:hover{background:#c82333}")
+        excluir_btn.clicked.connect(lambda checked, tx=t: self.excluir_transacao(tx))
+        self.transacoes_table.setCellWidget(row, 6, excluir_btn)
+
     def editar_transacao(self, transacao):
         try:
             from PyQt5.QtWidgets import QDialog, QFormLayout
             dialog = QDialog(self); dialog.setWindowTitle("✏️ Editar Transação"); dialog.setFixedSize(400, 300); dialog.setModal(True)
             layout = QFormLayout(dialog)
-            descricao_edit = QLineEdit(transacao[1]); descricao_edit.setStyleSheet("QLineEdit{padding:8px;border:2px solid #e1e5e9;border-radius:4px;font-size:14px;} QLineEdit:focus{border-color:#667eea}")
-            valor_edit = QLineEdit(str(transacao[2])); valor_edit.setStyleSheet(descricao_edit.styleSheet())
-            tipo_edit = QComboBox(); tipo_edit.addItems(["Receita", "Despesa"]); tipo_edit.setCurrentText(transacao[3].title())
+            descricao_edit = QLineEdit(transacao.descricao); descricao_edit.setStyleSheet("QLineEdit{padding:8px;border:2px solid #e1e5e9;border-radius:4px;font-size:14px;} QLineEdit:focus{border-color:#667eea}")
+            valor_edit = QLineEdit(str(transacao.valor)); valor_edit.setStyleSheet(descricao_edit.styleSheet())
+            tipo_edit = QComboBox(); tipo_edit.addItems(["Receita", "Despesa"]); tipo_edit.setCurrentText(transacao.tipo.title())
             tipo_edit.setStyleSheet("QComboBox{padding:8px;border:2px solid #e1e5e9;border-radius:4px;font-size:14px;}")
-            categoria_edit = QLineEdit(transacao[4]); categoria_edit.setStyleSheet(descricao_edit.styleSheet())
-            data_edit = QDateEdit(); data_edit.setDate(QDate.fromString(str(transacao[5]), Qt.DateFormat.ISODate)); data_edit.setStyleSheet(descricao_edit.styleSheet())
+            categoria_edit = QLineEdit(transacao.categoria); categoria_edit.setStyleSheet(descricao_edit.styleSheet())
+            data_edit = QDateEdit(); data_edit.setDate(QDate.fromString(str(transacao.data), Qt.DateFormat.ISODate)); data_edit.setStyleSheet(descricao_edit.styleSheet())
             layout.addRow("📝 Descrição:", descricao_edit)
             layout.addRow("💰 Valor:", valor_edit)
             layout.addRow("📊 Tipo:", tipo_edit)
@@ -319,7 +548,7 @@ class DashboardWindow(QMainWindow):
             from PyQt5.QtWidgets import QHBoxLayout
             buttons_layout = QHBoxLayout()
             salvar_btn = SimpleButton("💾 Salvar")
-            salvar_btn.clicked.connect(lambda: self.salvar_edicao_transacao(transacao[0], descricao_edit.text(), valor_edit.text(), tipo_edit.currentText().lower(), categoria_edit.text(), data_edit.date().toPyDate(), dialog))
+            salvar_btn.clicked.connect(lambda: self.salvar_edicao_transacao(transacao.id, descricao_edit.text(), valor_edit.text(), tipo_edit.currentText().lower(), categoria_edit.text(), data_edit.date().toPyDate(), dialog))
             cancelar_btn = SimpleButton("❌ Cancelar"); cancelar_btn.setStyleSheet("QPushButton{background:#6c757d;border:none;border-radius:6px;color:white;padding:8px 16px;font-weight:bold;} QPushButton:hover{background:#5a6268}")
             cancelar_btn.clicked.connect(dialog.reject)
             buttons_layout.addWidget(salvar_btn); buttons_layout.addWidget(cancelar_btn)
@@ -346,24 +575,209 @@ class DashboardWindow(QMainWindow):
     def excluir_transacao(self, transacao):
         try:
             from PyQt5.QtWidgets import QMessageBox
-            resposta = QMessageBox.question(self, "Confirmar Exclusão", f"Tem certeza que deseja excluir a transação:\n\n📝 {transacao[1]}\n💰 R$ {transacao[2]:.2f}\n📊 {transacao[3].title()}\n🏷️ {transacao[4]}\n\nEsta ação não pode ser desfeita!", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+            resposta = QMessageBox.question(self, "Confirmar Exclusão", f"Tem certeza que deseja excluir a transação:\n\n📝 {transacao.descricao}\n💰 R$ {transacao.valor:.2f}\n📊 {transacao.tipo.title()}\n🏷️ {transacao.categoria}\n\nEsta ação não pode ser desfeita!", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
             if resposta == QMessageBox.StandardButton.Yes:
-                if self.db_manager.excluir_transacao(transacao[0]):
+                if self.db_manager.excluir_transacao(transacao.id):
                     QMessageBox.information(self, "Sucesso", "Transação excluída com sucesso!"); self.carregar_dados()
                 else:
                     QMessageBox.critical(self, "Erro", "Erro ao excluir transação!")
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao excluir transação: {e}")
 
-    def atualizar_resumo(self, transacoes):
+    # --- Ações em lote ---
+    def transacoes_selecionadas(self):
+        linhas = sorted({index.row() for index in self.transacoes_table.selectionModel().selectedRows()})
+        return [self.transacoes[row] for row in linhas if row < len(self.transacoes)]
+
+    def registrar_desfazer(self, acao, linhas):
+        self.historico_desfazer.append((acao, linhas))
+        self.desfazer_btn.setEnabled(True)
+
+    def recategorizar_selecionadas(self):
+        try:
+            selecionadas = self.transacoes_selecionadas()
+            if not selecionadas:
+                QMessageBox.warning(self, "Erro", "Selecione ao menos uma transação!"); return
+            categoria, ok = QInputDialog.getText(self, "🏷️ Recategorizar", f"Nova categoria para {len(selecionadas)} transação(ões):")
+            categoria = categoria.strip()
+            if not ok or not categoria:
+                return
+            anteriores = [(t.id, t.categoria) for t in selecionadas]
+            if self.db_manager.recategorizar_transacoes([t.id for t in selecionadas], categoria):
+                self.registrar_desfazer("recategorizar", anteriores)
+                self.carregar_dados()
+            else:
+                QMessageBox.critical(self, "Erro", "Erro ao recategorizar transações!")
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao recategorizar transações: {e}")
+
+    def excluir_selecionadas(self):
         try:
-            if not transacoes:
+            selecionadas = self.transacoes_selecionadas()
+            if not selecionadas:
+                QMessageBox.warning(self, "Erro", "Selecione ao menos uma transação!"); return
+            resposta = QMessageBox.question(self, "Confirmar Exclusão", f"Excluir {len(selecionadas)} transação(ões) selecionada(s)?\n\nUse \"↩️ Desfazer\" para reverter.", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+            if resposta != QMessageBox.StandardButton.Yes:
+                return
+            removidas = self.db_manager.excluir_transacoes([t.id for t in selecionadas])
+            if removidas is None:
+                QMessageBox.critical(self, "Erro", "Erro ao excluir transações!"); return
+            self.registrar_desfazer("excluir", removidas)
+            self.carregar_dados()
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao excluir transações: {e}")
+
+    def desfazer_ultima_acao(self):
+        try:
+            if not self.historico_desfazer:
+                return
+            acao, linhas = self.historico_desfazer[-1]
+            if acao == "excluir":
+                ok = self.db_manager.restaurar_transacoes(linhas)
+            else:
+                ok = self.db_manager.restaurar_categorias(linhas)
+            if ok:
+                self.historico_desfazer.pop()
+                self.desfazer_btn.setEnabled(bool(self.historico_desfazer))
+                self.carregar_dados()
+            else:
+                QMessageBox.critical(self, "Erro", "Erro ao desfazer a última ação!")
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao desfazer: {e}")
+
+    def atualizar_resumo(self, lote, saldo):
+        try:
+            if not lote:
                 self.resumo_label.setText("Nenhuma transação encontrada"); return
-            receitas_count = len([t for t in transacoes if t[3] == 'receita'])
-            despesas_count = len([t for t in transacoes if t[3] == 'despesa'])
-            texto = f"Total de transações: {len(transacoes)}\nReceitas: {receitas_count}\nDespesas: {despesas_count}"
+            receitas_count = lote.contagem('receita')
+            despesas_count = lote.contagem('despesa')
+            texto = f"Total de transações: {len(lote)}\nReceitas: {receitas_count}\nDespesas: {despesas_count}"
+            projecao = self.db_manager.projetar_recorrencias(self.user_id, date.today() + timedelta(days=HORIZONTE_PROJECAO_DIAS))
+            if projecao:
+                saldo_projetado = saldo + sum(p[2] for p in projecao)
+                texto += f"\nSaldo projetado em {HORIZONTE_PROJECAO_DIAS} dias (recorrências): R$ {saldo_projetado:.2f}"
             self.resumo_label.setText(texto)
         except Exception as e:
             print(f"Erro ao atualizar resumo: {e}")
 
+    # --- Recorrências ---
+    def atualizar_recorrencias(self):
+        try:
+            nomes = {v: k for k, v in OPCOES_REPETICAO.items() if v}
+            regras = self.db_manager.buscar_recorrencias(self.user_id)
+            self.recorrencias_table.setRowCount(len(regras))
+            for row, (rid, descricao, valor, tipo, _, freq, intervalo, _, data_fim, _) in enumerate(regras):
+                sinal = "" if tipo == 'receita' else "-"
+                frequencia = nomes.get(freq, freq) if intervalo == 1 else f"{nomes.get(freq, freq)} (x{intervalo})"
+                self.recorrencias_table.setItem(row, 0, QTableWidgetItem(descricao))
+                self.recorrencias_table.setItem(row, 1, QTableWidgetItem(f"{sinal}R$ {valor:.2f}"))
+                self.recorrencias_table.setItem(row, 2, QTableWidgetItem(frequencia))
+                self.recorrencias_table.setItem(row, 3, QTableWidgetItem(str(data_fim) if data_fim else "—"))
+
+                encerrar_btn = SimpleButton("⏹️"); encerrar_btn.setFixedSize(60, 30)
+                encerrar_btn.setStyleSheet("QPushButton{background-color:#ffc107;border:none;border-radius:4px;color:#333;font-weight:bold;} QPushButton:hover{background:#e0a800}")
+                encerrar_btn.setEnabled(not data_fim or str(data_fim) > date.today().isoformat())
+                encerrar_btn.clicked.connect(lambda checked, r=rid, d=descricao: self.encerrar_recorrencia(r, d))
+                self.recorrencias_table.setCellWidget(row, 4, encerrar_btn)
+
+                excluir_btn = SimpleButton("🗑️"); excluir_btn.setFixedSize(60, 30)
+                excluir_btn.setStyleSheet("QPushButton{background-color:#dc3545;border:none;border-radius:4px;color:white;font-weight:bold;} QPushButton:hover{background:#c82333}")
+                excluir_btn.clicked.connect(lambda checked, r=rid, d=descricao: self.excluir_recorrencia(r, d))
+                self.recorrencias_table.setCellWidget(row, 5, excluir_btn)
+        except Exception as e:
+            print(f"Erro ao atualizar recorrências: {e}")
+
+    def encerrar_recorrencia(self, recorrencia_id, descricao):
+        try:
+            resposta = QMessageBox.question(self, "Encerrar Recorrência", f"Parar de gerar \"{descricao}\" a partir de hoje?\n\nAs transações já lançadas continuam.", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+            if resposta != QMessageBox.StandardButton.Yes:
+                return
+            # data_fim é inclusiva: o último dia gerado é ontem
+            if self.db_manager.encerrar_recorrencia(recorrencia_id, date.today() - timedelta(days=1)):
+                self.atualizar_recorrencias(); self.carregar_dados()
+            else:
+                QMessageBox.critical(self, "Erro", "Erro ao encerrar recorrência!")
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao encerrar recorrência: {e}")
+
+    def excluir_recorrencia(self, recorrencia_id, descricao):
+        try:
+            resposta = QMessageBox.question(self, "Excluir Recorrência", f"Excluir a regra \"{descricao}\"?\n\nAs transações já lançadas continuam.", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+            if resposta != QMessageBox.StandardButton.Yes:
+                return
+            if self.db_manager.excluir_recorrencia(recorrencia_id):
+                self.atualizar_recorrencias(); self.carregar_dados()
+            else:
+                QMessageBox.critical(self, "Erro", "Erro ao excluir recorrência!")
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao excluir recorrência: {e}")
 
+    # --- Orçamentos ---
+    def definir_orcamento(self):
+        try:
+            categoria, ok = QInputDialog.getText(self, "🎯 Definir Orçamento", "Categoria:")
+            categoria = categoria.strip()
+            if not ok or not categoria:
+                return
+            limite_text, ok = QInputDialog.getText(self, "🎯 Definir Orçamento", f"Limite mensal para {categoria} (R$):")
+            if not ok:
+                return
+            try:
+                limite = float(limite_text.replace(',', '.'))
+            except ValueError:
+                QMessageBox.warning(self, "Erro", "Valor inválido!"); return
+            if self.db_manager.definir_orcamento(self.user_id, categoria, limite):
+                self.atualizar_orcamentos()
+            else:
+                QMessageBox.critical(self, "Erro", "Erro ao definir orçamento!")
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao definir orçamento: {e}")
+
+    def atualizar_orcamentos(self):
+        try:
+            linhas = self.db_manager.buscar_orcamento_vs_real(self.user_id, date.today().strftime("%Y-%m"))
+            if not linhas:
+                self.orcamento_label.setText("Nenhum orçamento definido"); return
+            texto = []
+            for categoria, limite, gasto in linhas:
+                marcador = "🔴" if gasto >= limite else ("🟡" if limite and gasto >= 0.8 * limite else "🟢")
+                texto.append(f"{marcador} {categoria}: R$ {gasto:.2f} de R$ {limite:.2f}")
+            self.orcamento_label.setText("\n".join(texto))
+        except Exception as e:
+            print(f"Erro ao atualizar orçamentos: {e}")
+
+    def ao_alerta_orcamento(self, alertas):
+        for alerta in alertas:
+            if alerta.usuario_id != self.user_id:
+                continue
+            if alerta.estourou:
+                msg = f"O orçamento de {alerta.categoria} foi ultrapassado: R$ {alerta.total:.2f} de R$ {alerta.limite:.2f}."
+            else:
+                msg = f"{alerta.limiar:.0%} do orçamento de {alerta.categoria} já foi usado: R$ {alerta.total:.2f} de R$ {alerta.limite:.2f}."
+            QMessageBox.warning(self, "🎯 Orçamento", msg)
+
+    # --- Manutenção ---
+    def executar_manutencao(self, orcamento_ms=ORCAMENTO_MANUTENCAO_MS, permitir_conversao=False):
+        try:
+            manutencao = self.db_manager.manutencao
+            conversao = permitir_conversao and manutencao.conversao_pendente()
+            if not conversao and not manutencao.devida():
+                return
+            if conversao:
+                self.statusBar().showMessage("🧹 Otimizando o banco de dados (uma única vez)...")
+                self.statusBar().repaint()
+            relatorio = manutencao.executar(orcamento_ms, permitir_conversao=conversao)
+            if relatorio:
+                liberado_kb = (relatorio["bytes_liberados"] + relatorio["wal_bytes_liberados"]) / 1024
+                self.statusBar().showMessage(
+                    f"🧹 Manutenção do banco: {liberado_kb:.0f} KB liberados em {relatorio['tempo_ms']:.0f} ms", 5000
+                )
+        except Exception as e:
+            print(f"Erro na manutenção: {e}")
+
+    def closeEvent(self, event):
+        self.monitor_timer.stop()
+        self.manutencao_timer.stop()
+        self.executar_manutencao(ORCAMENTO_MANUTENCAO_SAIDA_MS, permitir_conversao=True)
+        self.db_manager.remover_ouvinte_orcamento(self.ouvinte_orcamento)
+        super().closeEvent(event)
@@ -1,4 +1,4 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QMessageBox
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QMessageBox, QCheckBox
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 
@@ -17,7 +17,7 @@ class LoginWindow(QWidget):
         self.setup_ui()
 
     def setup_ui(self):
-        self.setFixedSize(400, 500)
+        self.setFixedSize(400, 540)
         self.setWindowTitle("💰 Finanças Pessoais - Login")
 
         layout = QVBoxLayout()
@@ -48,6 +48,9 @@ class LoginWindow(QWidget):
         self.senha_input.setEchoMode(QLineEdit.EchoMode.Password)
         self.senha_input.setStyleSheet(self.email_input.styleSheet())
 
+        self.lembrar_check = QCheckBox("Lembrar de mim")
+        self.lembrar_check.setStyleSheet("color: #666;")
+
         self.login_btn = SimpleButton("Entrar")
         self.login_btn.clicked.connect(self.fazer_login)
 
@@ -64,6 +67,7 @@ class LoginWindow(QWidget):
         layout.addWidget(subtitle_label)
         layout.addWidget(self.email_input)
         layout.addWidget(self.senha_input)
+        layout.addWidget(self.lembrar_check)
         layout.addWidget(self.login_btn)
         layout.addWidget(self.registro_btn)
         layout.addStretch()
@@ -0,0 +1,192 @@
+"""
+Guarda de regressão de planos de consulta.
+
+Monta um banco sintético fixo, exercita todos os métodos do DatabaseManager
+rastreando cada SQL emitido e roda EXPLAIN QUERY PLAN em cada um. Falha se
+uma consulta quente fizer varredura completa (SCAN) ou ordenar em B-tree
+temporária, ou se estourar o orçamento de latência.
+
+Uso: python -m unittest discover tests
+"""
+
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+import unittest
+from datetime import date, timedelta
+
+from src.core.db import DatabaseManager
+
+# Dataset sintético (fixo para que os tempos sejam comparáveis)
+SEMENTE = 42
+USUARIOS = 3
+TRANSACOES_POR_USUARIO = 20_000
+CATEGORIAS = ("Mercado", "Casa", "Transporte", "Lazer", "Saúde", "Salário", "Educação", "Outros")
+
+# Orçamentos de latência por chamada (ms), com folga para máquinas lentas
+ORCAMENTOS_MS = {
+    "buscar_transacoes": 250,
+    "buscar_alteracoes": 50,
+    "ultima_sequencia": 10,
+    "buscar_orcamento_vs_real": 10,
+    "validar_sessao": 10,
+    "inserir_transacao": 50,
+    "recategorizar_transacoes": 100,
+    "excluir_transacoes": 100,
+    "materializar_recorrencias": 100,
+}
+
+# Statements frios (migração, limpeza de tabelas minúsculas) que podem varrer
+PERMITIDOS = (
+    re.compile(r"^INSERT INTO gastos_mensais .*GROUP BY", re.S),
+    re.compile(r"^DELETE FROM sessoes WHERE expira_em"),
+)
+
+PROBLEMAS_PLANO = (
+    re.compile(r"^SCAN (?!CONSTANT ROW)"),
+    re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY)"),
+)
+
+
+class DatabaseManagerRastreado(DatabaseManager):
+    """DatabaseManager que guarda todo SQL executado (com parâmetros expandidos)"""
+
+    def __init__(self, db_path: str = None):
+        self.sqls = []
+        self.conexoes = []
+        super().__init__(db_path)
+
+    def _conectar(self):
+        conn = super()._conectar()
+        conn.set_trace_callback(self.sqls.append)
+        self.conexoes.append(conn)
+        return conn
+
+    def fechar(self):
+        super().fechar()
+        for conn in self.conexoes:
+            conn.close()
+        self.conexoes.clear()
+
+
+def _normalizar(sql):
+    return " ".join(sql.split())
+
+
+def popular(db):
+    rnd = random.Random(SEMENTE)
+    inicio = date(2024, 1, 1)
+    for _ in range(USUARIOS):
+        db.inserir_usuario(f"Usuário {_}", f"u{_}@teste", "senha")
+    for usuario_id in range(1, USUARIOS + 1):
+        db.inserir_transacoes(
+            [
+                (
+                    f"Transação {i}",
+                    round(rnd.uniform(1, 500), 2),
+                    "receita" if rnd.random() < 0.2 else "despesa",
+                    rnd.choice(CATEGORIAS),
+                    (inicio + timedelta(days=rnd.randrange(730))).isoformat(),
+                )
+                for i in range(TRANSACOES_POR_USUARIO)
+            ],
+            usuario_id,
+        )
+        db.definir_orcamento(usuario_id, "Mercado", 1000)
+        db.inserir_recorrencia("Salário", 5000, "receita", "Salário", "mensal", 1, inicio, usuario_id)
+
+
+def exercitar(db):
+    """Chama cada método como a UI chama; devolve {método: ms}"""
+    tempos = {}
+
+    def medir(nome, *args, **kwargs):
+        t0 = time.perf_counter()
+        resultado = getattr(db, nome)(*args, **kwargs)
+        tempos[nome] = max(tempos.get(nome, 0.0), (time.perf_counter() - t0) * 1000)
+        return resultado
+
+    usuario_id = 1
+    hoje = date(2025, 12, 31)
+    medir("verificar_login", "u0@teste", "senha")
+    token = medir("criar_sessao", usuario_id)
+    medir("validar_sessao", token)
+    medir("materializar_recorrencias", usuario_id, hoje)
+    medir("materializar_recorrencias", usuario_id, hoje)
+    seq = medir("ultima_sequencia")
+    transacoes = medir("buscar_transacoes", usuario_id)
+    medir("inserir_transacao", "Feira", 80.0, "despesa", "Mercado", hoje.isoformat(), usuario_id)
+    alvo = transacoes[:50]
+    medir("atualizar_transacao", *alvo[0].como_tupla())
+    medir("atualizar_transacoes", [t.como_tupla() for t in alvo])
+    medir("recategorizar_transacoes", [t.id for t in alvo], "Outros")
+    medir("restaurar_categorias", [(t.id, t.categoria) for t in alvo])
+    medir("buscar_alteracoes", usuario_id, seq)
+    medir("buscar_orcamento_vs_real", usuario_id, hoje.strftime("%Y-%m"))
+    removidas = medir("excluir_transacoes", [t.id for t in alvo])
+    medir("restaurar_transacoes", removidas)
+    medir("excluir_transacao", alvo[0].id)
+    medir("excluir_transacoes_por_filtro", usuario_id, categoria="Lazer", data_inicio="2024-01-01", data_fim="2024-01-31")
+    medir("projetar_recorrencias", usuario_id, hoje + timedelta(days=90))
+    medir("buscar_recorrencias", usuario_id)
+    medir("revogar_sessao", token)
+    medir("revogar_sessoes_usuario", usuario_id)
+    medir("excluir_orcamento", usuario_id, "Mercado")
+    medir("encerrar_recorrencia", 1, hoje)
+    medir("excluir_recorrencia", 1)
+    return tempos
+
+
+def analisar_planos(db_path, sqls):
+    """Roda EXPLAIN QUERY PLAN em cada statement distinto; devolve [(sql, linha do plano)] problemáticos"""
+    problemas = []
+    vistos = set()
+    conn = sqlite3.connect(db_path)
+    try:
+        for sql in sqls:
+            sql = _normalizar(sql)
+            verbo = sql.split(" ", 1)[0].upper()
+            if verbo not in ("SELECT", "INSERT", "UPDATE", "DELETE") or sql in vistos:
+                continue
+            vistos.add(sql)
+            if any(p.search(sql) for p in PERMITIDOS):
+                continue
+            for _, _, _, detalhe in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+                if any(p.search(detalhe) for p in PROBLEMAS_PLANO):
+                    problemas.append((sql, detalhe))
+    finally:
+        conn.close()
+    return problemas
+
+
+def verificar(db_path):
+    """Devolve a lista de falhas (vazia se está tudo ok)"""
+    db = DatabaseManagerRastreado(db_path)
+    try:
+        popular(db)
+        db.manutencao.executar(orcamento_ms=5000)
+        db.sqls.clear()
+        tempos = exercitar(db)
+        sqls = list(db.sqls)
+    finally:
+        db.fechar()
+
+    falhas = [f"PLANO {detalhe} :: {sql}" for sql, detalhe in analisar_planos(db_path, sqls)]
+    for nome, limite in ORCAMENTOS_MS.items():
+        if tempos.get(nome, 0.0) > limite:
+            falhas.append(f"LATÊNCIA {nome}: {tempos[nome]:.1f}ms > {limite}ms")
+    return falhas
+
+
+class TestPlanos(unittest.TestCase):
+    def test_sem_varreduras_nem_estouro_de_latencia(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            falhas = verificar(os.path.join(pasta, "planos.db"))
+        self.assertEqual(falhas, [], "\n".join(falhas))
+
+
+if __name__ == "__main__":
+    unittest.main()